@@ -0,0 +1,46 @@
+-- Summary Table: headline numbers for the home page and dashboard
+-- One row, rebuilt with the other marts after each load, so the app reads
+-- these counts instead of scanning and joining the full tables per request
+WITH catalog AS (
+    SELECT
+        (SELECT COUNT(*) FROM {{ source('public', 'products') }}) AS total_products,
+        (SELECT COUNT(*) FROM {{ source('public', 'brands') }}) AS total_brands,
+        (SELECT COUNT(*) FROM {{ source('public', 'categories') }}) AS total_categories,
+        (SELECT COUNT(*) FROM {{ source('public', 'countries') }}) AS total_countries
+),
+
+-- Same figures as the dashboard query over dim_products x fact_nutrition
+dashboard AS (
+    SELECT
+        COUNT(*) AS total,
+        COUNT(DISTINCT fn.brand_name) AS brands,
+        COUNT(*) FILTER (WHERE dp.nutriscore_grade IN ('a', 'b')) AS healthy_count,
+        COUNT(*) FILTER (WHERE dp.nutriscore_grade IN ('d', 'e')) AS poor_count,
+        COUNT(*) FILTER (WHERE dp.nova_group = 4) AS ultra_processed_count
+    FROM {{ ref('dim_products') }} dp
+    JOIN {{ ref('fact_nutrition') }} fn ON dp.product_id = fn.product_id
+),
+
+-- Product counts per Nutri-Score grade and NOVA group
+histograms AS (
+    SELECT
+        COUNT(*) FILTER (WHERE nutriscore_grade = 'a') AS grade_a_count,
+        COUNT(*) FILTER (WHERE nutriscore_grade = 'b') AS grade_b_count,
+        COUNT(*) FILTER (WHERE nutriscore_grade = 'c') AS grade_c_count,
+        COUNT(*) FILTER (WHERE nutriscore_grade = 'd') AS grade_d_count,
+        COUNT(*) FILTER (WHERE nutriscore_grade = 'e') AS grade_e_count,
+        COUNT(*) FILTER (WHERE nova_group = 1) AS nova_1_count,
+        COUNT(*) FILTER (WHERE nova_group = 2) AS nova_2_count,
+        COUNT(*) FILTER (WHERE nova_group = 3) AS nova_3_count,
+        COUNT(*) FILTER (WHERE nova_group = 4) AS nova_4_count
+    FROM {{ ref('dim_products') }}
+)
+
+SELECT
+    catalog.*,
+    dashboard.*,
+    histograms.*,
+    CURRENT_TIMESTAMP::TIMESTAMP AS computed_at  -- Same type as dataset_version.updated_at
+FROM catalog
+CROSS JOIN dashboard
+CROSS JOIN histograms
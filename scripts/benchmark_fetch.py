@@ -0,0 +1,83 @@
+"""
+Benchmark: Arrow (COPY) fetch vs pandas.read_sql
+EAS 550 - Global Food & Nutrition Explorer
+
+Times utils/arrow_fetch.fetch_dataframe() against pd.read_sql() on a
+generated result set shaped like the app's reads (text, integer, numeric,
+float and boolean columns with NULLs), and checks that both return the same
+columns, dtypes and values.
+
+Usage:
+    python scripts/benchmark_fetch.py --rows 1000 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(SCRIPT_DIR), "streamlit_app"))
+
+from utils.arrow_fetch import fetch_dataframe
+
+load_dotenv()
+
+DATABASE_URL = (
+    f"postgresql://{os.getenv('DB_USER', 'postgres')}:{os.getenv('DB_PASSWORD', 'password')}"
+    f"@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '5432')}/{os.getenv('DB_NAME', 'food_nutrition_db')}"
+)
+
+BENCHMARK_QUERY = """
+    SELECT 'Product ' || g AS product_name,
+           CASE WHEN g % 11 = 0 THEN NULL ELSE 'Category ' || (g % 40) END AS category_name,
+           (g % 55) - 15 AS nutriscore_score,
+           CASE WHEN g % 3 = 0 THEN NULL ELSE 1 + g % 4 END AS nova_group,
+           ROUND((g % 9000) / 10.0, 3)::numeric(10, 3) AS energy_kcal_100g,
+           random() AS ratio,
+           g % 2 = 0 AS is_even
+    FROM generate_series(1, :n_rows) AS g
+"""
+
+
+def best_of(repeat, func):
+    """Fastest of `repeat` runs: (seconds, last result)"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(row_counts, repeat, database_url):
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        for n_rows in row_counts:
+            params = {'n_rows': n_rows}
+            read_sql_s, expected = best_of(repeat, lambda: pd.read_sql(text(BENCHMARK_QUERY), conn, params=params))
+            arrow_s, actual = best_of(repeat, lambda: fetch_dataframe(conn, BENCHMARK_QUERY, params))
+
+            print(f"\n{n_rows:,} rows")
+            print(f"  read_sql: {read_sql_s:8.3f}s")
+            print(f"  arrow:    {arrow_s:8.3f}s  ({read_sql_s / arrow_s:.1f}x faster)")
+
+            # 'ratio' is random() and differs between the two queries
+            assert list(actual.columns) == list(expected.columns), "column names differ"
+            assert dict(actual.dtypes) == dict(expected.dtypes), \
+                f"dtypes differ: {dict(actual.dtypes)} vs {dict(expected.dtypes)}"
+            pd.testing.assert_frame_equal(actual.drop(columns='ratio'), expected.drop(columns='ratio'))
+            print("  ✓ same columns, dtypes and values")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per method; the fastest is reported')
+    parser.add_argument('--database-url', default=DATABASE_URL)
+    args = parser.parse_args()
+    run(args.rows, args.repeat, args.database_url)
@@ -0,0 +1,115 @@
+"""
+Benchmark: dimension/junction table building in normalize_data()
+EAS 550 - Global Food & Nutrition Explorer
+
+Compares the original iterrows-based builder with the vectorized
+build_dimension_tables() on synthetic cleaned data, and checks that both
+produce the same tables (same names, same product/name relationships).
+
+Usage:
+    python scripts/benchmark_normalize.py --sizes 200000 2000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest_data import DIMENSIONS, build_dimension_tables
+
+# (source column, name column, id column) for each dimension
+DIMENSION_COLUMNS = [(source_col, name_col, id_col) for source_col, _, name_col, id_col, _ in DIMENSIONS]
+
+
+def make_cleaned_frame(n_rows, seed=42):
+    """Synthetic clean_data() output: codes plus four list-valued columns"""
+    rng = np.random.default_rng(seed)
+    vocab = {
+        'brands': [f"Brand {i}" for i in range(max(n_rows // 20, 10))],
+        'categories_en': [f"Category {i}" for i in range(5000)],
+        'countries_en': [f"Country {i}" for i in range(200)],
+        'labels_en': [f"Label {i}" for i in range(3000)],
+    }
+    max_items = {'brands': 2, 'categories_en': 6, 'countries_en': 3, 'labels_en': 4}
+
+    df = pd.DataFrame({'code': rng.integers(10**11, 10**13, n_rows).astype(str)})
+    for col, names in vocab.items():
+        counts = rng.integers(0, max_items[col] + 1, n_rows)
+        picks = rng.integers(0, len(names), counts.sum())
+        names = np.asarray(names, dtype=object)[picks]
+        df[col] = [list(chunk) for chunk in np.split(names, np.cumsum(counts)[:-1])]
+    return df
+
+
+def legacy_build_dimension_tables(df, source_col, name_col, id_col):
+    """The original per-row implementation from normalize_data()"""
+    names_list = []
+    for values in df[source_col]:
+        if isinstance(values, list):
+            names_list.extend(values)
+
+    dimension_df = pd.DataFrame({name_col: list(set(names_list))})
+    dimension_df = dimension_df[dimension_df[name_col] != '']
+    dimension_df[id_col] = range(1, len(dimension_df) + 1)
+    dimension_df = dimension_df[[id_col, name_col]]
+
+    junction_list = []
+    for idx, row in df.iterrows():
+        product_code = str(row['code'])
+        if pd.notna(product_code) and product_code != 'nan':
+            values = row[source_col]
+            if isinstance(values, list):
+                for value in set(values):
+                    if value:
+                        junction_list.append({'product_code': product_code, name_col: value})
+
+    junction_df = pd.DataFrame(junction_list)
+    if len(junction_df) > 0:
+        name_to_id = dimension_df.set_index(name_col)[id_col].to_dict()
+        junction_df[id_col] = junction_df[name_col].map(name_to_id)
+        junction_df = junction_df[['product_code', id_col]].dropna()
+
+    return dimension_df, junction_df
+
+
+def _as_pairs(dimension_df, junction_df, name_col, id_col):
+    """Resolve a junction table back to (product_code, name) pairs, ignoring surrogate ids"""
+    resolved = junction_df.merge(dimension_df, on=id_col)
+    return set(zip(resolved['product_code'], resolved[name_col]))
+
+
+def run(sizes, skip_legacy_above):
+    for n_rows in sizes:
+        df = make_cleaned_frame(n_rows)
+        print(f"\n{n_rows:,} rows")
+
+        start = time.perf_counter()
+        vectorized = [build_dimension_tables(df, *dim) for dim in DIMENSION_COLUMNS]
+        vectorized_s = time.perf_counter() - start
+        print(f"  vectorized: {vectorized_s:8.2f}s")
+
+        if n_rows > skip_legacy_above:
+            print("  legacy:     skipped (use --skip-legacy-above to include)")
+            continue
+
+        start = time.perf_counter()
+        legacy = [legacy_build_dimension_tables(df, *dim) for dim in DIMENSION_COLUMNS]
+        legacy_s = time.perf_counter() - start
+        print(f"  legacy:     {legacy_s:8.2f}s  ({legacy_s / vectorized_s:.1f}x slower)")
+
+        for (source_col, name_col, id_col), new, old in zip(DIMENSION_COLUMNS, vectorized, legacy):
+            assert set(new[0][name_col]) == set(old[0][name_col]), f"{source_col}: names differ"
+            assert len(new[1]) == len(old[1]), f"{source_col}: junction sizes differ"
+            assert _as_pairs(*new, name_col, id_col) == _as_pairs(*old, name_col, id_col), \
+                f"{source_col}: relationships differ"
+        print("  ✓ identical tables")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200000, 2000000])
+    parser.add_argument('--skip-legacy-above', type=int, default=10**9,
+                        help='Only time the legacy builder up to this many rows')
+    args = parser.parse_args()
+    run(args.sizes, args.skip_legacy_above)
@@ -0,0 +1,122 @@
+"""
+Benchmark: prepared statements vs text() for the hot app queries
+EAS 550 - Global Food & Nutrition Explorer
+
+Runs each statement registered in utils/queries.py (search_products,
+product_details, healthier_alternatives, similar_by_macros) through
+pd.read_sql(text()) and through utils/prepared.execute_prepared() on the
+same pooled connection, with parameters drawn from real products in
+analytics.dim_products, and reports mean/p50/p95 latency per method. The
+query cache is not involved, so every call reaches PostgreSQL.
+
+The short point lookups (product_details) gain the most: their execution
+time is small next to parsing and planning, which a prepared statement skips.
+
+Usage:
+    python scripts/benchmark_prepared.py --iterations 500
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(SCRIPT_DIR), "streamlit_app"))
+
+from utils import queries
+from utils.prepared import execute_prepared
+
+load_dotenv()
+
+DATABASE_URL = (
+    f"postgresql://{os.getenv('DB_USER', 'postgres')}:{os.getenv('DB_PASSWORD', 'password')}"
+    f"@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '5432')}/{os.getenv('DB_NAME', 'food_nutrition_db')}"
+)
+
+SAMPLE_QUERY = """
+    SELECT dp.product_name, fn.energy_kcal_100g, fn.sugars_100g, fn.proteins_100g
+    FROM analytics.dim_products dp
+    JOIN analytics.fact_nutrition fn ON dp.product_id = fn.product_id
+    WHERE fn.energy_kcal_100g IS NOT NULL AND fn.sugars_100g IS NOT NULL AND fn.proteins_100g IS NOT NULL
+    ORDER BY random()
+    LIMIT :n
+"""
+
+
+def parameter_sets(products):
+    """{statement name: (query, params for one product)} for each sampled product"""
+    for p in products.itertuples(index=False):
+        energy, sugar, protein = float(p.energy_kcal_100g), float(p.sugars_100g), float(p.proteins_100g)
+        yield {
+            'product_details': (queries.PRODUCT_DETAILS_QUERY, {'name': p.product_name}),
+            'search_products': (queries.SEARCH_PRODUCTS_QUERY,
+                                {'search': f"%{p.product_name.split(' ')[0]}%", 'limit': 20}),
+            'healthier_alternatives': (queries.HEALTHIER_ALTERNATIVES_QUERY, {
+                'cat_search': f"%{p.product_name.split(' ')[0]}%", 'current_name': p.product_name,
+                'sugar': sugar, 'protein': protein, 'energy': energy,
+            }),
+            'similar_by_macros': (queries.SIMILAR_BY_MACROS_QUERY, {
+                'min_e': energy * 0.8, 'max_e': energy * 1.2,
+                'min_s': sugar * 0.8, 'max_s': sugar * 1.2,
+                'min_p': protein * 0.8, 'max_p': protein * 1.2,
+            }),
+        }
+
+
+def summarize(samples):
+    ms = sorted(1000 * s for s in samples)
+    return {
+        'mean': statistics.fmean(ms),
+        'p50': ms[len(ms) // 2],
+        'p95': ms[min(int(len(ms) * 0.95), len(ms) - 1)],
+    }
+
+
+def run(iterations, seed, database_url):
+    random.seed(seed)
+    engine = create_engine(database_url, pool_size=1)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT setseed(:seed)"), {'seed': seed / 2 ** 31})
+        products = pd.read_sql(text(SAMPLE_QUERY), conn, params={'n': iterations})
+        if products.empty:
+            sys.exit("analytics.dim_products is empty; load data and run dbt first")
+        runs = list(parameter_sets(products))
+
+        timings = {name: {'text': [], 'prepared': []} for name in runs[0]}
+        for params_by_statement in runs:
+            for name, (query, params) in params_by_statement.items():
+                # Alternate the order so neither method always runs on a warmer cache
+                methods = [
+                    ('text', lambda: pd.read_sql(text(query), conn, params=params)),
+                    ('prepared', lambda: execute_prepared(conn, name, params)),
+                ]
+                random.shuffle(methods)
+                for method, func in methods:
+                    start = time.perf_counter()
+                    func()
+                    timings[name][method].append(time.perf_counter() - start)
+
+    print(f"\n{len(runs)} calls per statement and method (latency in ms)\n")
+    print(f"  {'statement':<24}{'method':<10}{'mean':>8}{'p50':>8}{'p95':>8}")
+    for name, by_method in timings.items():
+        stats = {method: summarize(samples) for method, samples in by_method.items()}
+        for method, s in stats.items():
+            print(f"  {name:<24}{method:<10}{s['mean']:8.3f}{s['p50']:8.3f}{s['p95']:8.3f}")
+        saved = stats['text']['p50'] - stats['prepared']['p50']
+        print(f"  {'':<24}{'saved':<10}{'':>8}{saved:8.3f}  ({100 * saved / stats['text']['p50']:.0f}% of p50)\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=500, help='Sampled products, i.e. calls per statement')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', default=DATABASE_URL)
+    args = parser.parse_args()
+    run(args.iterations, args.seed, args.database_url)
@@ -0,0 +1,183 @@
+"""
+Synthetic Open Food Facts source
+EAS 550 - Global Food & Nutrition Explorer
+
+Generates raw product frames shaped like the output of
+download_openfoodfacts_data(): the SELECTED_COLUMNS as strings, with None
+for missing values. The distributions follow the US slice of the real dump
+closely enough to exercise every cleaning rule:
+
+- brands / categories / labels are comma-separated lists of skewed
+  (Zipf-like) popularity, with duplicates and missing values
+- quantities mix units ("340 g", "12 fl oz", "1.5 l") and junk values
+- nutrients follow plausible per-100g ranges (sugars <= carbohydrates,
+  saturated fat <= fat, sodium = salt / 2.5), with a few negative values
+- placeholders ('unknown', '') appear where the real data has them
+
+Columns are built with vectorized operations, not a loop per row, and the
+same seed always gives the same frame.
+
+Usage:
+    from synthetic_openfoodfacts import generate_raw_products
+    df_raw = generate_raw_products(1_000_000)
+"""
+
+import numpy as np
+import pandas as pd
+
+from ingest_data import SELECTED_COLUMNS
+
+CATEGORY_ROOTS = [
+    'Snacks', 'Beverages', 'Dairies', 'Plant-based foods', 'Meats', 'Frozen foods',
+    'Breakfasts', 'Desserts', 'Condiments', 'Cereals and potatoes', 'Seafood', 'Sweeteners',
+]
+PNNS_GROUPS = [
+    'Biscuits and cakes', 'Sweets', 'Sweetened beverages', 'Cheese', 'Milk and yogurt',
+    'Bread', 'Cereals', 'Fruits', 'Vegetables', 'Processed meat', 'Dressings and sauces',
+    'Appetizers', 'One-dish meals', 'Fats', 'Fish and seafood', 'Legumes', 'Nuts',
+    'Fruit juices', 'Unsweetened beverages', 'Dried fruits', 'Ice cream', 'Pizza pies and quiches',
+]
+QUANTITY_UNITS = ['g', 'g', 'g', 'oz', 'ml', 'l', 'fl oz', 'kg', 'lb']
+OTHER_COUNTRIES = ['Canada', 'Mexico', 'France', 'United Kingdom', 'Germany', 'Puerto Rico']
+ALLERGENS = ['en:milk', 'en:gluten', 'en:soybeans', 'en:eggs', 'en:nuts', 'en:peanuts', 'en:fish']
+WORDS = [
+    'organic', 'sugar', 'salt', 'water', 'wheat flour', 'corn syrup', 'milk', 'soy lecithin',
+    'natural flavor', 'palm oil', 'cocoa', 'rice', 'tomato', 'vinegar', 'spices', 'yeast',
+    'citric acid', 'whey', 'butter', 'egg', 'peanuts', 'almonds', 'oats', 'honey', 'garlic',
+]
+ADJECTIVES = ['Classic', 'Organic', 'Crunchy', 'Original', 'Light', 'Spicy', 'Sweet', 'Whole', 'Mini', 'Family']
+NOUNS = ['Cookies', 'Chips', 'Yogurt', 'Soda', 'Cereal', 'Crackers', 'Salsa', 'Granola', 'Juice',
+         'Cheese', 'Bread', 'Pasta', 'Soup', 'Candy', 'Bar', 'Tea', 'Coffee', 'Sauce']
+
+# Per-100g nutrient ranges: (column, distribution scale, upper bound, share missing)
+NUTRIENTS = [
+    ('energy-kcal_100g', 250.0, 900.0, 0.03),
+    ('fat_100g', 10.0, 100.0, 0.05),
+    ('carbohydrates_100g', 30.0, 100.0, 0.05),
+    ('fiber_100g', 3.0, 40.0, 0.25),
+    ('proteins_100g', 7.0, 90.0, 0.05),
+    ('salt_100g', 0.8, 20.0, 0.08),
+]
+
+
+def _missing(rng, n_rows, share):
+    return rng.random(n_rows) < share
+
+
+def _pick(rng, vocabulary, size):
+    """
+    Indices into `vocabulary` with a Zipf-like popularity skew: log-uniform,
+    so item i is drawn with probability roughly proportional to 1 / i
+    """
+    return (len(vocabulary) ** rng.random(size)).astype(np.int64) - 1
+
+
+def _join_lists(rng, vocabulary, n_rows, max_items, separator):
+    """
+    Comma-separated lists of 1..max_items values, built column by column so
+    no Python loop runs per row
+    """
+    vocabulary = np.asarray(vocabulary, dtype=object)
+    counts = rng.integers(1, max_items + 1, n_rows)
+    joined = pd.Series(vocabulary[_pick(rng, vocabulary, n_rows)], dtype=object)
+    for position in range(1, max_items):
+        item = pd.Series(vocabulary[_pick(rng, vocabulary, n_rows)], dtype=object)
+        joined = joined.where(counts <= position, joined + separator + item)
+    return joined
+
+
+def _format_numbers(values, missing):
+    """Numbers as the raw dump stores them: text, with None where missing"""
+    text = np.round(values, 3).astype(str).astype(object)
+    text[missing] = None
+    return pd.Series(text)
+
+
+def generate_raw_products(n_rows, seed=42):
+    """
+    Build `n_rows` raw US products with a nutriscore
+
+    Returns: DataFrame with SELECTED_COLUMNS, all strings or None
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(index=pd.RangeIndex(n_rows))
+
+    # Unique 13-digit barcodes in random order
+    codes = 10**12 + rng.permutation(n_rows).astype(np.int64) * 7919 + 17
+    df['code'] = pd.Series(codes.astype(str).astype(object))
+
+    # Names, with the occasional placeholder or stray whitespace
+    names = (pd.Series(np.asarray(ADJECTIVES, dtype=object)[rng.integers(0, len(ADJECTIVES), n_rows)])
+             + ' ' + pd.Series(np.asarray(NOUNS, dtype=object)[rng.integers(0, len(NOUNS), n_rows)]))
+    names = names.where(rng.random(n_rows) > 0.05, '  ' + names + ' ')
+    names[_missing(rng, n_rows, 0.02)] = None
+    names[_missing(rng, n_rows, 0.005)] = 'unknown'
+    df['product_name'] = names
+
+    # Quantities: "<number> <unit>" plus some values the parser must reject
+    amounts = np.where(rng.random(n_rows) < 0.6, rng.integers(1, 1000, n_rows),
+                       np.round(rng.uniform(0.1, 5, n_rows), 1))
+    units = np.asarray(QUANTITY_UNITS, dtype=object)[rng.integers(0, len(QUANTITY_UNITS), n_rows)]
+    quantity = pd.Series(amounts.astype(str).astype(object)).str.replace(r'\.0$', '', regex=True) + ' ' + pd.Series(units)
+    quantity = quantity.where(rng.random(n_rows) > 0.03, '1 serving (30 g)')
+    quantity = quantity.where(rng.random(n_rows) > 0.02, 'family size')
+    quantity[_missing(rng, n_rows, 0.15)] = None
+    df['quantity'] = quantity
+
+    image_url = "https://images.openfoodfacts.org/images/products/" + df['code'] + "/front_en.3.400.jpg"
+    image_url[_missing(rng, n_rows, 0.3)] = None
+    df['image_url'] = image_url
+
+    # Multi-valued columns; brand vocabulary grows with the data like the real dump
+    brands = _join_lists(rng, [f"Brand {i}" for i in range(max(n_rows // 20, 50))], n_rows, 2, ', ')
+    brands[_missing(rng, n_rows, 0.05)] = None
+    df['brands'] = brands
+
+    subcategories = [f"{root} {i}" for root in CATEGORY_ROOTS for i in range(400)]
+    categories = (pd.Series(np.asarray(CATEGORY_ROOTS, dtype=object)[_pick(rng, CATEGORY_ROOTS, n_rows)])
+                  + ',' + _join_lists(rng, subcategories, n_rows, 6, ','))
+    categories[_missing(rng, n_rows, 0.1)] = None
+    df['categories_en'] = categories
+
+    countries = pd.Series(['United States'] * n_rows, dtype=object)
+    countries = countries.where(rng.random(n_rows) > 0.1,
+                                'United States,' + _join_lists(rng, OTHER_COUNTRIES, n_rows, 2, ','))
+    df['countries_en'] = countries
+
+    ingredients = _join_lists(rng, WORDS, n_rows, 12, ', ')
+    ingredients[_missing(rng, n_rows, 0.25)] = None
+    df['ingredients_text'] = ingredients
+
+    allergens = _join_lists(rng, ALLERGENS, n_rows, 3, ',')
+    allergens[_missing(rng, n_rows, 0.7)] = None
+    df['allergens_en'] = allergens
+
+    labels = _join_lists(rng, [f"Label {i}" for i in range(3000)], n_rows, 5, ',')
+    labels[_missing(rng, n_rows, 0.5)] = None
+    df['labels_en'] = labels
+
+    # Nutriscore is always present (the download filters on it); the grade follows the score
+    score = rng.integers(-15, 41, n_rows)
+    df['nutriscore_score'] = pd.Series(score.astype(str).astype(object))
+    grade = np.select([score <= -1, score <= 2, score <= 10, score <= 18], ['a', 'b', 'c', 'd'], 'e')
+    grade = pd.Series(grade, dtype=object).where(rng.random(n_rows) > 0.1, pd.Series(grade).str.upper())
+    df['nutriscore_grade'] = grade
+
+    df['nova_group'] = _format_numbers(rng.integers(1, 5, n_rows), _missing(rng, n_rows, 0.3))
+    pnns = pd.Series(np.asarray(PNNS_GROUPS, dtype=object)[rng.integers(0, len(PNNS_GROUPS), n_rows)])
+    pnns[_missing(rng, n_rows, 0.2)] = 'unknown'
+    df['pnns_groups_2'] = pnns
+
+    # Nutrients: skewed positive values, capped, with a few data-entry negatives
+    values = {}
+    for col, scale, upper, share_missing in NUTRIENTS:
+        values[col] = np.minimum(rng.gamma(1.5, scale / 1.5, n_rows), upper)
+        values[col][rng.random(n_rows) < 0.001] *= -1
+        df[col] = _format_numbers(values[col], _missing(rng, n_rows, share_missing))
+    df['saturated-fat_100g'] = _format_numbers(values['fat_100g'] * rng.uniform(0, 0.7, n_rows),
+                                               _missing(rng, n_rows, 0.08))
+    df['sugars_100g'] = _format_numbers(values['carbohydrates_100g'] * rng.uniform(0, 1, n_rows),
+                                        _missing(rng, n_rows, 0.06))
+    df['sodium_100g'] = _format_numbers(values['salt_100g'] / 2.5, df['salt_100g'].isna().to_numpy())
+
+    return df[SELECTED_COLUMNS]
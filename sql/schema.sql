@@ -15,6 +15,7 @@ DROP TABLE IF EXISTS countries CASCADE;
 DROP TABLE IF EXISTS categories CASCADE;
 DROP TABLE IF EXISTS brands CASCADE;
 DROP TABLE IF EXISTS products CASCADE;
+DROP TABLE IF EXISTS dataset_version;
 
 -- ============================================================================
 -- CORE ENTITY: products
@@ -32,6 +33,7 @@ CREATE TABLE products (
     nutriscore_grade VARCHAR(1) CHECK (nutriscore_grade IN ('a', 'b', 'c', 'd', 'e')),
     nova_group INTEGER CHECK (nova_group BETWEEN 1 AND 4),
     pnns_groups_2 VARCHAR(100),
+    row_hash VARCHAR(16),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -39,6 +41,7 @@ COMMENT ON TABLE products IS 'Core product information from Open Food Facts';
 COMMENT ON COLUMN products.code IS 'Unique product identifier (barcode)';
 COMMENT ON COLUMN products.nutriscore_grade IS 'Nutritional quality score: a (best) to e (worst)';
 COMMENT ON COLUMN products.nova_group IS 'Food processing level: 1 (unprocessed) to 4 (ultra-processed)';
+COMMENT ON COLUMN products.row_hash IS 'Hash of the cleaned source row, used by incremental ingestion to skip unchanged products';
 
 -- ============================================================================
 -- DIMENSION: brands
@@ -147,6 +150,24 @@ CREATE TABLE nutrition_facts (
 
 COMMENT ON TABLE nutrition_facts IS 'Nutritional information per 100g of product';
 
+-- ============================================================================
+-- METADATA: dataset_version (single row)
+-- ============================================================================
+-- Bumped by the ingestion pipeline and by dbt after every load/build; the app
+-- caches query results per version instead of on fixed timers. Versions are
+-- microsecond timestamps, so a recreated schema never reuses an old version.
+CREATE TABLE dataset_version (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL,
+    updated_by VARCHAR(20) NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO dataset_version (id, version, updated_by)
+VALUES (1, (EXTRACT(EPOCH FROM clock_timestamp()) * 1000000)::BIGINT, 'schema');
+
+COMMENT ON TABLE dataset_version IS 'Current data version; changes whenever loaded or derived data changes';
+
 -- ============================================================================
 -- PERFORMANCE INDEXES
 -- ============================================================================
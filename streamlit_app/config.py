@@ -12,6 +12,75 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', 'password')
 }
 
+# Connection pool sizing (one pool per Streamlit server process). The pool can
+# hold pool_size + max_overflow connections; a query waits up to pool_timeout
+# seconds for one to free up.
+DB_POOL = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', '10')),
+    'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+    'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),  # Seconds before a connection is replaced
+    'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'  # Test connections on checkout
+}
+
+# Read replicas as comma-separated host[:port] entries, e.g.
+# "replica1:5432,replica2:5432", with the database, user and password of
+# DB_CONFIG. Read-only queries go to the healthy replica with the fewest
+# queries in flight; the primary above takes them only when every replica
+# is down. Each replica is checked every DB_REPLICA_CHECK_INTERVAL seconds,
+# and one lagging more than DB_REPLICA_MAX_LAG_S seconds counts as down (0: no limit).
+# Connecting to a replica gives up after DB_REPLICA_CONNECT_TIMEOUT seconds.
+DB_REPLICAS = [entry.strip() for entry in os.getenv('DB_REPLICAS', '').split(',') if entry.strip()]
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '10'))
+DB_REPLICA_MAX_LAG_S = float(os.getenv('DB_REPLICA_MAX_LAG_S', '30'))
+DB_REPLICA_CONNECT_TIMEOUT = int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', '3'))
+
+# How execute_query() reads results: 'arrow' streams them through COPY into
+# Arrow columns (utils/arrow_fetch.py); 'read_sql' uses pandas.read_sql
+FETCH_MODE = os.getenv('FETCH_MODE', 'arrow')
+
+# Run the hot lookups registered in utils/queries.py as server-side prepared
+# statements (utils/prepared.py): prepared once per pooled connection, then
+# executed by name so PostgreSQL skips parsing and can reuse the plan
+PREPARED_STATEMENTS = os.getenv('PREPARED_STATEMENTS', 'true').lower() == 'true'
+
+# Shared query-result cache (utils/query_cache.py), so replicas and restarts
+# reuse each other's results: 'sqlite' (file at QUERY_CACHE_PATH), 'redis'
+# (server at QUERY_CACHE_URL, needs the redis package) or 'none' (in-process only)
+QUERY_CACHE_BACKEND = os.getenv('QUERY_CACHE_BACKEND', 'sqlite')
+QUERY_CACHE_PATH = os.getenv(
+    'QUERY_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'query_cache.sqlite')
+)
+QUERY_CACHE_URL = os.getenv('QUERY_CACHE_URL', 'redis://localhost:6379/0')
+# Results kept in this process when the shared cache is 'none' or unavailable
+QUERY_CACHE_MEMORY_ENTRIES = int(os.getenv('QUERY_CACHE_MEMORY_ENTRIES', '256'))
+
+# Cached results are keyed on the dataset_version row that ingestion and dbt
+# bump after each load, so they stay valid until the next load. The version
+# is re-read at most once per interval (seconds), which bounds how long a
+# process can serve results from before a load.
+DATASET_VERSION_CHECK_INTERVAL = int(os.getenv('DATASET_VERSION_CHECK_INTERVAL', '30'))
+# Expiry (seconds) used only against databases without a dataset_version table
+QUERY_CACHE_FALLBACK_TTL = int(os.getenv('QUERY_CACHE_FALLBACK_TTL', '600'))
+
+# Latency budgets (milliseconds) per query class, enforced with PostgreSQL's
+# statement_timeout; 0 disables a budget. Queries over budget are answered
+# with the last good cached result, marked stale, while a background refresh
+# reruns them with QUERY_REFRESH_TIMEOUT_MS and re-caches the result.
+QUERY_BUDGETS_MS = {
+    'lookup': int(os.getenv('QUERY_BUDGET_LOOKUP_MS', '1000')),       # Single-product reads
+    'search': int(os.getenv('QUERY_BUDGET_SEARCH_MS', '3000')),       # ILIKE searches and swap/twin finders
+    'analytics': int(os.getenv('QUERY_BUDGET_ANALYTICS_MS', '10000'))  # Aggregates and charts (the default)
+}
+QUERY_REFRESH_TIMEOUT_MS = int(os.getenv('QUERY_REFRESH_TIMEOUT_MS', '60000'))
+# How long (seconds) the last good result of a query is kept for stale serving
+QUERY_STALE_TTL = int(os.getenv('QUERY_STALE_TTL', '86400'))
+
+# Token for the diagnostics page (pages/7_Admin_Diagnostics.py), opened as
+# ?token=<ADMIN_TOKEN>; the page stays locked while this is unset
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+
 # App Configuration
 APP_TITLE = "Global Food & Nutrition Explorer"
 APP_ICON = "🍎"
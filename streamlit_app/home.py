@@ -1,4 +1,5 @@
 import streamlit as st
+import pandas as pd
 import sys
 import os
 
@@ -64,6 +65,8 @@ if not stats.empty:
         st.markdown(f"<div style='background-color:#ff9800;padding:20px;border-radius:10px;text-align:center;'><h2 style='color:white;margin:0;'>{ultra_pct:.0f}%</h2><p style='color:white;margin:0;'>Ultra-Processed (NOVA 4)</p></div>", unsafe_allow_html=True)
     with c3:
         st.markdown(f"<div style='background-color:#4CAF50;padding:20px;border-radius:10px;text-align:center;'><h2 style='color:white;margin:0;'>{good_pct:.0f}%</h2><p style='color:white;margin:0;'>Healthy (A/B)</p></div>", unsafe_allow_html=True)
+    if 'computed_at' in stats.columns:
+        st.caption(f"Summary computed {pd.Timestamp(row['computed_at']):%Y-%m-%d %H:%M}")
 
 st.markdown("---")
 st.markdown("### 🎯 Explore the Sidebar for Deep Dives, Comparisons, and Swaps!")
\ No newline at end of file
@@ -1,8 +1,9 @@
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-import pandas as pd
+from functools import partial
 
+from utils.database import execute_batch
 from utils.queries import (
     get_nutrition_distribution_by_category,
     get_nutrition_by_grade,
@@ -27,25 +28,46 @@ Explore detailed nutritional analysis across products, categories, and nutrition
 Use the filters below to customize your analysis.
 """)
 
+# The filters keep their values in session state, so every query of this run
+# can start before the widgets are drawn (defaults on the first run)
+filter_category = st.session_state.get('filter_category', "All Categories")
+filter_grade = st.session_state.get('filter_grade', "All Grades")
+filter_threshold = st.session_state.get('filter_threshold', 5.0)
+
+# All page queries are independent: run them at once instead of one by one
+with st.spinner("Loading data..."):
+    results, errors = execute_batch({
+        'categories': get_categories_list,
+        'distribution': partial(get_nutrition_distribution_by_category, filter_grade),
+        'grades': get_nutrition_by_grade,
+        'scatter': get_energy_vs_nutrients_scatter,
+        'box': partial(get_nutrition_by_filtered_category, filter_category),
+        'high_sugar': partial(get_high_sugar_products, filter_threshold),
+    })
+
+def show_errors(*names):
+    """Report failed queries in the section that needed them"""
+    for name in names:
+        if name in errors:
+            st.error(f"Error loading data: {str(errors[name])}")
+
 # Sidebar filters
 st.sidebar.header("🎛️ Filters")
 
 # Category filter
-with st.spinner("Loading categories..."):
-    try:
-        categories_df = get_categories_list()
-        if not categories_df.empty:
-            category_options = ["All Categories"] + categories_df['category_name'].tolist()
-        else:
-            category_options = ["All Categories"]
-    except Exception as e:
-        st.sidebar.error(f"Error loading categories: {str(e)}")
-        category_options = ["All Categories"]
+categories_df = results['categories']
+if 'categories' in errors:
+    st.sidebar.error(f"Error loading categories: {str(errors['categories'])}")
+if not categories_df.empty:
+    category_options = ["All Categories"] + categories_df['category_name'].tolist()
+else:
+    category_options = ["All Categories"]
 
 selected_category = st.sidebar.selectbox(
     "Select Category",
     options=category_options,
-    index=0
+    index=0,
+    key='filter_category'
 )
 
 # Nutrition grade filter
@@ -53,7 +75,8 @@ grade_options = ["All Grades", "a", "b", "c", "d", "e"]
 selected_grade = st.sidebar.selectbox(
     "Nutrition Grade",
     options=grade_options,
-    index=0
+    index=0,
+    key='filter_grade'
 )
 
 # Nutriscore threshold slider
@@ -63,7 +86,8 @@ sugar_threshold = st.sidebar.slider(
     max_value=20.0,
     value=5.0,
     step=0.5,
-    help="Products above this nutriscore are considered poor nutrition"
+    help="Products above this nutriscore are considered poor nutrition",
+    key='filter_threshold'
 )
 
 st.sidebar.markdown("---")
@@ -81,15 +105,9 @@ tab1, tab2, tab3, tab4 = st.tabs([
 with tab1:
     st.header("Nutriscore Distribution by Category")
     
-    # Load data first
-    with st.spinner("Loading distribution data..."):
-        try:
-            dist_df = get_nutrition_distribution_by_category(selected_grade)
-            grade_df = get_nutrition_by_grade()
-        except Exception as e:
-            st.error(f"Error loading data: {str(e)}")
-            dist_df = pd.DataFrame()
-            grade_df = pd.DataFrame()
+    show_errors('distribution', 'grades')
+    dist_df = results['distribution']
+    grade_df = results['grades']
 
     # --- SECTION 1: METRICS (Moved to top for better layout) ---
     if not dist_df.empty:
@@ -167,12 +185,8 @@ with tab1:
 with tab2:
     st.header("Nutriscore vs NOVA Group Analysis")
     
-    with st.spinner("Loading scatter data..."):
-        try:
-            scatter_df = get_energy_vs_nutrients_scatter()
-        except Exception as e:
-            st.error(f"Error loading data: {str(e)}")
-            scatter_df = pd.DataFrame()
+    show_errors('scatter')
+    scatter_df = results['scatter']
     
     if not scatter_df.empty:
         st.markdown("""
@@ -224,12 +238,12 @@ with tab2:
 with tab3:
     st.header("Nutriscore Distribution Analysis")
     
-    with st.spinner("Loading box plot data..."):
-        try:
+    show_errors('box')
+    box_df = results['box']
+    if selected_category != filter_category:
+        # The remembered category is no longer offered and the selectbox fell back
+        with st.spinner("Loading box plot data..."):
             box_df = get_nutrition_by_filtered_category(selected_category)
-        except Exception as e:
-            st.error(f"Error loading data: {str(e)}")
-            box_df = pd.DataFrame()
     
     if not box_df.empty:
         # Create box plot by nutrition grade
@@ -282,12 +296,8 @@ with tab4:
     **Remember:** Lower nutriscore is better (Grade A = best, Grade E = worst)
     """)
     
-    with st.spinner("Detecting poor nutrition products..."):
-        try:
-            high_sugar_df = get_high_sugar_products(sugar_threshold)
-        except Exception as e:
-            st.error(f"Error loading data: {str(e)}")
-            high_sugar_df = pd.DataFrame()
+    show_errors('high_sugar')
+    high_sugar_df = results['high_sugar']
     
     if not high_sugar_df.empty:
         col1, col2 = st.columns([1, 2])
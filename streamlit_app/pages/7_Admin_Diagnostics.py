@@ -0,0 +1,68 @@
+import hmac
+
+import streamlit as st
+import pandas as pd
+from utils.database import get_pool_metrics, get_query_metrics, get_replica_status, metrics_to_prometheus
+from utils.query_metrics import query_metrics
+from config import ADMIN_TOKEN
+
+st.set_page_config(page_title="Diagnostics", page_icon="🛠️", layout="wide")
+
+# Only reachable with ?token=<ADMIN_TOKEN>; everyone else sees a dead end
+token = st.query_params.get("token", "")
+if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+    st.info("Nothing to see here.")
+    st.stop()
+
+st.title("🛠️ Query Diagnostics")
+st.caption("Metrics of this app process since it started (or since the last reset). Latency percentiles cover the last 1000 calls per query.")
+
+# === QUERIES ===
+metrics = pd.DataFrame(get_query_metrics())
+if metrics.empty:
+    st.warning("No queries recorded yet.")
+else:
+    c1, c2, c3, c4 = st.columns(4)
+    lookups = metrics['cache_hits'].sum() + metrics['cache_misses'].sum()
+    c1.metric("Queries", f"{metrics['calls'].sum():,}")
+    c2.metric("Cache Hit Ratio", f"{metrics['cache_hits'].sum() / lookups:.0%}" if lookups else "n/a")
+    c3.metric("Errors", f"{metrics['errors'].sum():,}")
+    c4.metric("Slowest p95", f"{metrics['p95_ms'].max():.1f} ms")
+
+    st.markdown("#### ⏱️ Per Query")
+    st.dataframe(
+        metrics.drop(columns='last_error'),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'cache_hit_ratio': st.column_config.NumberColumn("cache hit ratio", format="%.2f"),
+            'p50_ms': st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+            'p95_ms': st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+            'p99_ms': st.column_config.NumberColumn("p99 (ms)", format="%.1f"),
+            'mean_ms': st.column_config.NumberColumn("mean (ms)", format="%.1f"),
+        }
+    )
+
+    errors = metrics[metrics['errors'] > 0]
+    if not errors.empty:
+        st.markdown("#### ❌ Last Error per Query")
+        st.dataframe(errors[['query', 'errors', 'last_error']], hide_index=True, use_container_width=True)
+
+# === CONNECTION POOL ===
+st.markdown("#### 🔌 Connection Pool")
+st.dataframe(pd.DataFrame([get_pool_metrics()]), hide_index=True, use_container_width=True)
+
+replicas = pd.DataFrame(get_replica_status())
+if not replicas.empty:
+    st.markdown("#### 🪞 Read Replicas")
+    replicas['checked_at'] = pd.to_datetime(replicas['checked_at'], unit='s')
+    st.dataframe(replicas, hide_index=True, use_container_width=True)
+
+# === EXPORT ===
+st.markdown("---")
+c1, c2 = st.columns(2)
+c1.download_button("⬇️ Prometheus metrics", metrics_to_prometheus(), file_name="food_explorer_metrics.prom",
+                   mime="text/plain")
+if c2.button("🔄 Reset query metrics"):
+    query_metrics.reset()
+    st.rerun()
@@ -0,0 +1,83 @@
+"""Columnar query results for execute_query(): COPY ... TO STDOUT parsed by the Arrow CSV reader"""
+
+import io
+import threading
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from sqlalchemy import text
+
+# PostgreSQL type OIDs -> Arrow types; anything else is read as text
+PG_ARROW_TYPES = {
+    16: pa.bool_(),                 # bool
+    20: pa.int64(),                 # int8
+    21: pa.int64(),                 # int2
+    23: pa.int64(),                 # int4
+    700: pa.float64(),              # float4
+    701: pa.float64(),              # float8
+    1700: pa.float64(),             # numeric (read_sql coerces Decimal to float)
+    1082: pa.date32(),              # date
+    1114: pa.timestamp('us'),       # timestamp
+}
+
+_column_cache = {}
+_column_cache_lock = threading.Lock()
+
+
+def _compile(conn, query: str, params: Optional[dict]):
+    """Render `query` (with :name binds) to final SQL with the parameters inlined by the driver"""
+    compiled = text(query.strip().rstrip(';')).compile(dialect=conn.dialect)
+    template = str(compiled)
+    with conn.connection.cursor() as cursor:
+        sql = cursor.mogrify(template, compiled.construct_params(params or {})).decode()
+    return template, sql
+
+
+def _result_columns(conn, template: str, sql: str):
+    """[(name, Arrow type)] of the query's result, from a cached LIMIT 0 probe"""
+    with _column_cache_lock:
+        columns = _column_cache.get(template)
+    if columns is None:
+        with conn.connection.cursor() as cursor:
+            cursor.execute(f"SELECT * FROM ({sql}) AS probe LIMIT 0")
+            columns = [(col.name, PG_ARROW_TYPES.get(col.type_code, pa.string())) for col in cursor.description]
+        with _column_cache_lock:
+            _column_cache[template] = columns
+    return columns
+
+
+def fetch_arrow(conn, query: str, params: Optional[dict] = None) -> pa.Table:
+    """Run a SELECT on a SQLAlchemy connection and return the result as an Arrow table"""
+    template, sql = _compile(conn, query, params)
+    columns = _result_columns(conn, template, sql)
+
+    buffer = io.BytesIO()
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv)", buffer)
+    if not columns:
+        return pa.table({})
+    if buffer.tell() == 0:
+        return pa.schema(columns).empty_table()
+
+    buffer.seek(0)
+    return pa_csv.read_csv(
+        buffer,
+        read_options=pa_csv.ReadOptions(column_names=[name for name, _ in columns]),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=dict(columns),
+            # COPY writes NULL as an empty unquoted field and '' as ""
+            null_values=[''],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+            true_values=['t'],
+            false_values=['f'],
+        ),
+    )
+
+
+def fetch_dataframe(conn, query: str, params: Optional[dict] = None) -> pd.DataFrame:
+    """fetch_arrow() converted to a DataFrame with read_sql()-compatible dtypes"""
+    return fetch_arrow(conn, query, params).to_pandas()
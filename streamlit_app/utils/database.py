@@ -1,19 +1,30 @@
 import streamlit as st
-from sqlalchemy import create_engine, text
-from sqlalchemy.pool import NullPool
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from psycopg2.errors import QueryCanceled
 import pandas as pd
-from typing import Optional
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, Tuple, Union
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Import config - using try/except for robustness
 try:
-    import sys
     import os
     # Get the parent directory of utils (which is streamlit_app)
     current_file_dir = os.path.dirname(os.path.abspath(__file__))
     parent_dir = os.path.dirname(current_file_dir)
     if parent_dir not in sys.path:
         sys.path.insert(0, parent_dir)
-    from config import DB_CONFIG
+    from config import (
+        DB_CONFIG, DB_POOL, FETCH_MODE, PREPARED_STATEMENTS,
+        QUERY_CACHE_BACKEND, QUERY_CACHE_PATH, QUERY_CACHE_URL, QUERY_CACHE_MEMORY_ENTRIES,
+        DATASET_VERSION_CHECK_INTERVAL, QUERY_CACHE_FALLBACK_TTL,
+        QUERY_BUDGETS_MS, QUERY_REFRESH_TIMEOUT_MS, QUERY_STALE_TTL,
+        DB_REPLICAS, DB_REPLICA_CHECK_INTERVAL, DB_REPLICA_MAX_LAG_S, DB_REPLICA_CONNECT_TIMEOUT
+    )
 except:
     # Fallback config if import fails
     DB_CONFIG = {
@@ -23,43 +34,404 @@ except:
         'user': 'analyst_user',
         'password': 'analyst_pass'
     }
+    DB_POOL = {
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True
+    }
+    FETCH_MODE = 'arrow'
+    PREPARED_STATEMENTS = True
+    QUERY_CACHE_BACKEND = 'none'
+    QUERY_CACHE_PATH = None
+    QUERY_CACHE_URL = None
+    QUERY_CACHE_MEMORY_ENTRIES = 256
+    DATASET_VERSION_CHECK_INTERVAL = 30
+    QUERY_CACHE_FALLBACK_TTL = 600
+    QUERY_BUDGETS_MS = {'lookup': 1000, 'search': 3000, 'analytics': 10000}
+    QUERY_REFRESH_TIMEOUT_MS = 60000
+    QUERY_STALE_TTL = 86400
+    DB_REPLICAS = []
+    DB_REPLICA_CHECK_INTERVAL = 10
+    DB_REPLICA_MAX_LAG_S = 30
+    DB_REPLICA_CONNECT_TIMEOUT = 3
 
-@st.cache_resource
-def get_engine():
-    """Create and cache database engine"""
-    connection_string = (
+from .arrow_fetch import fetch_dataframe
+from .prepared import STATEMENTS, execute_prepared
+from .query_metrics import query_metrics
+from .replicas import Replica, ReplicaRouter
+from .query_cache import MemoryCache, create_cache, make_cache_key, make_stale_key, serialize_frame, deserialize_frame
+
+
+class PoolMetrics:
+    """Thread-safe counters for connection pool usage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0          # New physical connections opened
+        self.timeouts = 0          # Checkouts that gave up after pool_timeout
+        self.wait_total_s = 0.0    # Time spent acquiring connections
+        self.wait_max_s = 0.0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+
+    def on_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, pool):
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+            self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.wait_total_s += seconds
+            self.wait_max_s = max(self.wait_max_s, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self, pool):
+        with self._lock:
+            return {
+                'pool_size': pool.size(),
+                'max_overflow': getattr(pool, '_max_overflow', DB_POOL['max_overflow']),
+                'checked_out': pool.checkedout(),
+                'idle': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'peak_checked_out': self.peak_checked_out,
+                'peak_overflow': max(self.peak_overflow, 0),
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': 1000 * self.wait_total_s / self.checkouts if self.checkouts else 0.0,
+                'wait_max_ms': 1000 * self.wait_max_s
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+def _connection_string(host: str, port) -> str:
+    return (
         f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}"
-        f"@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+        f"@{host}:{port}/{DB_CONFIG['database']}"
     )
-    return create_engine(connection_string, poolclass=NullPool)
 
-@st.cache_data(ttl=600)
-def execute_query(query: str, params: Optional[dict] = None) -> pd.DataFrame:
-    """Execute SQL query and return results as DataFrame"""
+@st.cache_resource
+def get_engine():
+    """Create and cache the pooled database engine of the primary (sized by DB_POOL)"""
+    engine = create_engine(_connection_string(DB_CONFIG['host'], DB_CONFIG['port']), **DB_POOL)
+    event.listen(engine, 'connect', lambda dbapi_conn, record: pool_metrics.on_connect())
+    event.listen(engine, 'checkout', lambda dbapi_conn, record, proxy: pool_metrics.on_checkout(engine.pool))
+    return engine
+
+
+def connect():
+    """Check a connection out of the pool, recording how long it took"""
+    engine = get_engine()
+    start = time.perf_counter()
+    try:
+        conn = engine.connect()
+    except PoolTimeoutError:
+        # Every connection stayed busy for pool_timeout seconds
+        pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+        raise
+    pool_metrics.record_wait(time.perf_counter() - start)
+    return conn
+
+
+@st.cache_resource
+def get_replica_router() -> Optional[ReplicaRouter]:
+    """Router over one pooled engine per DB_REPLICAS entry, or None without replicas"""
+    if not DB_REPLICAS:
+        return None
+    replicas = []
+    for entry in DB_REPLICAS:
+        host, _, port = entry.partition(':')
+        engine = create_engine(
+            _connection_string(host, port or DB_CONFIG['port']),
+            # Anything but reads is refused, even on a replica that is not in recovery;
+            # an unreachable replica fails fast and the query falls back to the primary
+            connect_args={'options': '-c default_transaction_read_only=on',
+                          'connect_timeout': DB_REPLICA_CONNECT_TIMEOUT},
+            **DB_POOL
+        )
+        replicas.append(Replica(entry, engine))
+    return ReplicaRouter(replicas, check_interval=DB_REPLICA_CHECK_INTERVAL,
+                         max_lag_s=DB_REPLICA_MAX_LAG_S).start()
+
+def read_connection():
+    """Connection for a read-only query: a replica when one is healthy, else the primary"""
+    router = get_replica_router()
+    if router is None:
+        return connect()
+    return router.connect(fallback=connect)
+
+def get_replica_status() -> list:
+    """Health, queries in flight, request and failure counts and lag of each replica"""
+    router = get_replica_router()
+    return router.status() if router is not None else []
+
+def get_pool_metrics() -> dict:
+    """Current pool state plus checkout, wait time and overflow counters"""
+    return pool_metrics.snapshot(get_engine().pool)
+
+def get_query_metrics() -> list:
+    """Per-query calls, p50/p95/p99 latency, rows, bytes, cache hits/misses and errors"""
+    return query_metrics.snapshot()
+
+def metrics_to_prometheus() -> str:
+    """Query, pool and replica metrics in Prometheus text format"""
+    gauges = {f"pool_{key}": value for key, value in get_pool_metrics().items()}
+    replicas = get_replica_status()
+    for key in ('healthy', 'outstanding', 'requests', 'failures'):
+        for replica in replicas:
+            gauges[f'replica_{key}{{replica="{replica["replica"]}"}}'] = replica[key]
+    return query_metrics.to_prometheus(extra_gauges=gauges)
+
+@st.cache_resource
+def get_query_cache():
+    """Create the query-result cache; an in-process one when the shared cache is off or unavailable"""
+    try:
+        return create_cache(QUERY_CACHE_BACKEND, path=QUERY_CACHE_PATH, url=QUERY_CACHE_URL,
+                            max_entries=QUERY_CACHE_MEMORY_ENTRIES)
+    except Exception as e:
+        print(f"Shared query cache unavailable, caching in this process only: {e}")
+        return MemoryCache(QUERY_CACHE_MEMORY_ENTRIES)
+
+def _read_cache(cache, key: str) -> Optional[pd.DataFrame]:
+    # A cache outage only costs speed, never the page
+    try:
+        data = cache.get(key)
+        return deserialize_frame(data) if data is not None else None
+    except Exception as e:
+        print(f"Query cache read failed: {e}")
+        return None
+
+def _write_cache(cache, entries: Dict[str, Optional[int]], df: pd.DataFrame):
+    # {key: ttl}; the frame is serialized once for all of them
     try:
-        engine = get_engine()
-        with engine.connect() as conn:
-            if params:
-                result = pd.read_sql(text(query), conn, params=params)
-            else:
-                result = pd.read_sql(text(query), conn)
-        return result
+        data = serialize_frame(df)
+        for key, ttl in entries.items():
+            cache.set(key, data, ttl=ttl)
     except Exception as e:
-        st.error(f"Database error: {str(e)}")
+        print(f"Query cache write failed: {e}")
+
+_version_lock = threading.Lock()
+_version_state = {'version': None, 'checked_at': float('-inf')}
+
+def get_dataset_version():
+    """Current dataset_version (re-read every DATASET_VERSION_CHECK_INTERVAL s, None if unreadable)"""
+    with _version_lock:
+        if time.monotonic() - _version_state['checked_at'] < DATASET_VERSION_CHECK_INTERVAL:
+            return _version_state['version']
+        try:
+            # Always from the primary: loads bump it there first
+            with connect() as conn:
+                version = conn.execute(text("SELECT version FROM dataset_version WHERE id = 1")).scalar()
+        except Exception as e:
+            print(f"Could not read dataset_version, caching with a {QUERY_CACHE_FALLBACK_TTL}s TTL: {e}")
+            version = None
+        changed = version != _version_state['version']
+        _version_state.update(version=version, checked_at=time.monotonic())
+    
+    cache = get_query_cache()
+    if changed and version is not None and cache is not None:
+        try:
+            cache.evict_other_versions(version)
+        except Exception as e:
+            print(f"Query cache eviction failed: {e}")
+    return version
+
+def _fetch(conn, query: str, params: Optional[dict], statement: Optional[str], timeout_ms: int) -> pd.DataFrame:
+    """Run one query on `conn`, cancelled by PostgreSQL after `timeout_ms` (0: no limit)"""
+    if statement and PREPARED_STATEMENTS and statement in STATEMENTS:
+        # Sends the timeout in the same round trip as the statement
+        return execute_prepared(conn, statement, params, timeout_ms)
+    if timeout_ms:
+        # Local to this transaction, which ends when the connection goes back to the pool
+        conn.execute(text("SELECT set_config('statement_timeout', :ms, true)"), {'ms': str(timeout_ms)})
+    if FETCH_MODE == 'arrow':
+        return fetch_dataframe(conn, query, params)
+    if params:
+        return pd.read_sql(text(query), conn, params=params)
+    return pd.read_sql(text(query), conn)
+
+def _sees_version(conn, version) -> bool:
+    """Whether `conn` already has dataset `version`; a replica can still be replaying an earlier load"""
+    if version is None or conn.engine is get_engine():
+        return True
+    # Read before the query, whose snapshot is then at least this recent
+    seen = conn.execute(text("SELECT version FROM dataset_version WHERE id = 1")).scalar()
+    return seen is not None and seen >= version
+
+def _is_statement_timeout(e: Exception) -> bool:
+    # SQLAlchemy wraps driver errors; the psycopg2 one is in .orig
+    return isinstance(getattr(e, 'orig', e), QueryCanceled)
+
+_refresh_lock = threading.Lock()
+_refreshing = set()
+
+@st.cache_resource
+def get_refresh_executor():
+    """Background threads that rerun over-budget queries"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix='query-refresh')
+
+def _schedule_refresh(cache, key: str, stale_key: str, version, ttl: Optional[int],
+                      query: str, params: Optional[dict], statement: Optional[str], name: str, read_only: bool):
+    """Rerun a query that ran over budget with QUERY_REFRESH_TIMEOUT_MS and cache the result; once per key at a time"""
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    
+    def refresh():
+        start = time.perf_counter()
+        try:
+            with (read_connection() if read_only else connect()) as conn:
+                current = _sees_version(conn, version)
+                result = _fetch(conn, query, params, statement, QUERY_REFRESH_TIMEOUT_MS)
+            if current:
+                _write_cache(cache, {key: ttl, stale_key: QUERY_STALE_TTL}, result)
+            _record_query(f"{name} (refresh)", start, result, cache_hit=None)
+        except Exception as e:
+            query_metrics.record(f"{name} (refresh)", time.perf_counter() - start, error=f"{type(e).__name__}: {e}",
+                                 timed_out=_is_statement_timeout(e))
+            print(f"Background refresh of {name} failed: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
+    
+    get_refresh_executor().submit(refresh)
+
+def execute_query(query: str, params: Optional[dict] = None, use_cache: bool = True,
+                  statement: Optional[str] = None, name: Optional[str] = None,
+                  budget: str = 'analytics', read_only: bool = True) -> pd.DataFrame:
+    """Execute SQL query and return results as DataFrame (cached, budgeted, replica-routed when read_only)"""
+    name = name or statement or sys._getframe(1).f_code.co_name
+    start = time.perf_counter()
+    cache = get_query_cache() if use_cache else None
+    if cache is not None:
+        version = get_dataset_version()
+        key = make_cache_key(query, params, version)
+        ttl = None if version is not None else QUERY_CACHE_FALLBACK_TTL
+        cached = _read_cache(cache, key)
+        if cached is not None:
+            _record_query(name, start, cached, cache_hit=True)
+            return cached
+    
+    budget_ms = QUERY_BUDGETS_MS.get(budget, QUERY_BUDGETS_MS['analytics'])
+    try:
+        with (read_connection() if read_only else connect()) as conn:
+            current = cache is None or _sees_version(conn, version)
+            result = _fetch(conn, query, params, statement, budget_ms)
+    except Exception as e:
+        timed_out = _is_statement_timeout(e)
+        if timed_out and cache is not None:
+            stale_key = make_stale_key(query, params)
+            _schedule_refresh(cache, key, stale_key, version, ttl, query, params, statement, name, read_only)
+            stale = _read_cache(cache, stale_key)
+            if stale is not None:
+                stale.attrs['stale'] = True
+                _record_query(name, start, stale, cache_hit=False, timed_out=True, stale=True)
+                st.toast("⏳ Showing earlier results while fresh ones load")
+                return stale
+        query_metrics.record(name, time.perf_counter() - start, cache_hit=False if cache is not None else None,
+                             error=f"{type(e).__name__}: {e}", timed_out=timed_out)
+        if timed_out:
+            st.error(f"This query took longer than {budget_ms / 1000:g}s and was cancelled. Please try again shortly.")
+        else:
+            st.error(f"Database error: {str(e)}")
         return pd.DataFrame()
+    
+    # A lagging replica's result is served but not cached under the newer version
+    if cache is not None and current:
+        _write_cache(cache, {key: ttl, make_stale_key(query, params): QUERY_STALE_TTL}, result)
+    _record_query(name, start, result, cache_hit=False if cache is not None else None)
+    return result
+
+def _record_query(name: str, start: float, result: pd.DataFrame, cache_hit: Optional[bool], **flags):
+    query_metrics.record(name, time.perf_counter() - start, rows=len(result),
+                         nbytes=int(result.memory_usage(index=False, deep=True).sum()), cache_hit=cache_hit, **flags)
+
+BatchQuery = Union[str, Tuple[str, Optional[dict]], Callable[[], pd.DataFrame]]
+
+@st.cache_resource
+def get_batch_executor():
+    """Threads for execute_batch(), one per pooled connection, shared by all sessions"""
+    return ThreadPoolExecutor(max_workers=DB_POOL['pool_size'] + DB_POOL['max_overflow'],
+                              thread_name_prefix='query-batch')
+
+def execute_batch(queries: Dict[str, BatchQuery]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Exception]]:
+    """Run independent queries (SQL, (SQL, params) or callables) at once: ({name: DataFrame}, {name: error})"""
+    def as_callable(name, query):
+        if callable(query):
+            return query
+        sql, params = (query, None) if isinstance(query, str) else query
+        return lambda: execute_query(sql, params, name=name)
+    
+    # Worker threads need the session's script context for st.error()
+    ctx = get_script_run_ctx()
+    def run(task):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return task()
+    
+    executor = get_batch_executor()
+    futures = {name: executor.submit(run, as_callable(name, query)) for name, query in queries.items()}
+    wait(futures.values())
+    
+    # A failed query leaves an empty frame under its own name; the others keep their results
+    results, errors = {}, {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            errors[name] = e
+            results[name] = pd.DataFrame()
+    return results, errors
 
 def test_connection():
     """Test database connection"""
     try:
-        df = execute_query("SELECT 1 as test")
+        df = execute_query("SELECT 1 as test", use_cache=False, budget='lookup', read_only=False)
         return len(df) > 0
     except Exception as e:
         print(f"Connection test failed: {e}")
         return False
 
-@st.cache_data(ttl=3600)
+def get_dataset_summary() -> pd.DataFrame:
+    """The dbt-built analytics.dataset_summary row; empty if not built yet or older than the last ingest"""
+    present = execute_query(
+        "SELECT to_regclass('analytics.dataset_summary') IS NOT NULL AS present, "
+        "to_regclass('public.dataset_version') IS NOT NULL AS versioned",
+        name='dataset_summary_exists', budget='lookup'
+    )
+    if present.empty or not bool(present['present'].iloc[0]):
+        return pd.DataFrame()
+    if not bool(present['versioned'].iloc[0]):
+        return execute_query("SELECT * FROM analytics.dataset_summary", name='dataset_summary', budget='lookup')
+    
+    # dbt bumps the version right after building the summary; a later bump by ingestion makes it stale
+    summary = execute_query(
+        "SELECT s.*, COALESCE(v.updated_by <> 'dbt' AND v.updated_at > s.computed_at, FALSE) AS stale "
+        "FROM analytics.dataset_summary s LEFT JOIN public.dataset_version v ON v.id = 1",
+        name='dataset_summary', budget='lookup'
+    )
+    if summary.empty or bool(summary['stale'].iloc[0]):
+        return pd.DataFrame()
+    return summary.drop(columns='stale')
+
 def get_database_stats():
     """Get basic database statistics"""
+    summary = get_dataset_summary()
+    if not summary.empty:
+        row = summary.iloc[0]
+        return {key: int(row[key]) for key in ('total_products', 'total_brands', 'total_categories', 'total_countries')}
+    
     stats = {}
     
     try:
@@ -0,0 +1,85 @@
+"""Server-side prepared statements for the hot queries in utils/queries.py"""
+
+import re
+from typing import Dict, Optional
+
+import pandas as pd
+import psycopg2.errors
+
+# :name placeholders, but not '::type' casts
+_PLACEHOLDER = re.compile(r'(?<!:):([A-Za-z_]\w*)')
+
+_INFO_KEY = 'prepared_statements'
+
+
+class PreparedStatement:
+    """One query with :name placeholders, rewritten as PREPARE name (types) AS ... $1 ... $n"""
+
+    def __init__(self, name: str, query: str, param_types: Dict[str, str]):
+        self.name = name
+        self.query = query
+        self.param_names = []
+        for param in _PLACEHOLDER.findall(query):
+            if param not in self.param_names:
+                self.param_names.append(param)
+        missing = set(self.param_names) - set(param_types)
+        if missing:
+            raise ValueError(f"Statement {name!r} has no type for parameters {sorted(missing)}")
+
+        body = _PLACEHOLDER.sub(lambda m: f"${self.param_names.index(m.group(1)) + 1}",
+                                query.strip().rstrip(';'))
+        types = ", ".join(param_types[param] for param in self.param_names)
+        self.prepare_sql = f"PREPARE {name} ({types}) AS {body}" if types else f"PREPARE {name} AS {body}"
+        placeholders = ", ".join(["%s"] * len(self.param_names))
+        self.execute_sql = f"EXECUTE {name} ({placeholders})" if placeholders else f"EXECUTE {name}"
+
+    def bind(self, params: Optional[dict]) -> list:
+        params = params or {}
+        return [params[param] for param in self.param_names]
+
+
+STATEMENTS: Dict[str, PreparedStatement] = {}
+
+
+def register_statement(name: str, query: str, param_types: Dict[str, str]) -> PreparedStatement:
+    """Add a statement to the registry; `param_types` maps each :name to a PostgreSQL type"""
+    statement = PreparedStatement(name, query, param_types)
+    STATEMENTS[name] = statement
+    return statement
+
+
+def execute_prepared(conn, name: str, params: Optional[dict] = None, timeout_ms: int = 0) -> pd.DataFrame:
+    """Run registered statement `name` on a SQLAlchemy connection, preparing it first if needed"""
+    statement = STATEMENTS[name]
+    pooled = conn.connection
+    prepared = pooled.info.setdefault(_INFO_KEY, set())
+    # Sent with the first statement of each attempt, so a retry after rollback keeps the budget
+    setup = f"SET LOCAL statement_timeout = {int(timeout_ms)}; " if timeout_ms else ""
+
+    for attempt in range(2):
+        try:
+            with pooled.cursor() as cursor:
+                pending_setup = setup
+                if name not in prepared:
+                    cursor.execute(pending_setup + statement.prepare_sql)
+                    prepared.add(name)
+                    pending_setup = ""
+                cursor.execute(pending_setup + statement.execute_sql, statement.bind(params))
+                columns = [col.name for col in cursor.description]
+                rows = cursor.fetchall()
+            break
+        except psycopg2.errors.InvalidSqlStatementName:
+            # The session lost its prepared statements; prepare again once
+            pooled.rollback()
+            prepared.clear()
+            if attempt:
+                raise
+        except psycopg2.errors.DuplicatePreparedStatement:
+            # Prepared by someone else on this session; just execute it
+            pooled.rollback()
+            prepared.add(name)
+            if attempt:
+                raise
+
+    # coerce_float turns NUMERIC Decimals into floats, as read_sql does
+    return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
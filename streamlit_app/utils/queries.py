@@ -1,14 +1,13 @@
 import pandas as pd
 from typing import Optional
-from .database import execute_query
+from .database import execute_query, get_dataset_summary
+from .prepared import register_statement
 
 # ==============================================================================
 # 1. GENERAL SEARCH & LOOKUP
 # ==============================================================================
 
-def search_products(search_term, limit=20):
-    """Search for products by name (fuzzy match)."""
-    query = """
+SEARCH_PRODUCTS_QUERY = """
     SELECT 
         dp.product_name,
         fn.brand_name,
@@ -25,11 +24,14 @@ def search_products(search_term, limit=20):
     ORDER BY dp.nutriscore_score ASC
     LIMIT :limit;
     """
-    return execute_query(query, params={'search': f"%{search_term}%", 'limit': limit})
+register_statement('search_products', SEARCH_PRODUCTS_QUERY, {'search': 'text', 'limit': 'int'})
 
-def get_product_details(product_name):
-    """Get full details for a specific product name"""
-    query = """
+def search_products(search_term, limit=20):
+    """Search for products by name (fuzzy match)."""
+    return execute_query(SEARCH_PRODUCTS_QUERY, params={'search': f"%{search_term}%", 'limit': int(limit)},
+                         statement='search_products', budget='search')
+
+PRODUCT_DETAILS_QUERY = """
     SELECT 
         dp.product_name,
         fn.brand_name,
@@ -45,13 +47,22 @@ def get_product_details(product_name):
     WHERE dp.product_name = :name
     LIMIT 1;
     """
-    return execute_query(query, params={'name': product_name})
+register_statement('product_details', PRODUCT_DETAILS_QUERY, {'name': 'text'})
+
+def get_product_details(product_name):
+    """Get full details for a specific product name"""
+    return execute_query(PRODUCT_DETAILS_QUERY, params={'name': product_name}, statement='product_details', budget='lookup')
 
 # ==============================================================================
 # 2. DASHBOARD STATS
 # ==============================================================================
 
 def get_dashboard_stats():
+    """Headline counts for the home page, from analytics.dataset_summary when it is up to date"""
+    summary = get_dataset_summary()
+    if not summary.empty:
+        return summary[['total', 'brands', 'healthy_count', 'poor_count', 'ultra_processed_count', 'computed_at']]
+
     query = """
     SELECT
         COUNT(*) as total,
@@ -89,22 +100,13 @@ def find_products_by_category_keyword(keyword, sort_order='ASC', limit=50):
     ORDER BY {order_clause}
     LIMIT :limit;
     """
-    return execute_query(query, params={'keyword': f"%{keyword}%", 'limit': limit})
+    return execute_query(query, params={'keyword': f"%{keyword}%", 'limit': limit}, budget='search')
 
 # ==============================================================================
 # 4. SWAPS & TWINS (COMPLEX LOGIC)
 # ==============================================================================
 
-def find_healthier_alternatives(product_name, current_sugar, current_protein, current_energy):
-    """Find healthier alternatives using native Python types to avoid numpy errors"""
-    first_word = product_name.split(' ')[0]
-    
-    # FIX: Explicitly cast numpy floats to python floats
-    c_sugar = float(current_sugar)
-    c_protein = float(current_protein)
-    c_energy = float(current_energy)
-    
-    query = """
+HEALTHIER_ALTERNATIVES_QUERY = """
     SELECT 
         dp.product_name,
         fn.brand_name,
@@ -122,22 +124,30 @@ def find_healthier_alternatives(product_name, current_sugar, current_protein, cu
     ORDER BY fn.sugars_100g ASC
     LIMIT 10;
     """
-    return execute_query(query, params={
+# Nutrient values are numeric like the nutrition_facts columns they are compared with
+register_statement('healthier_alternatives', HEALTHIER_ALTERNATIVES_QUERY, {
+    'cat_search': 'text', 'current_name': 'text',
+    'sugar': 'numeric', 'protein': 'numeric', 'energy': 'numeric'
+})
+
+def find_healthier_alternatives(product_name, current_sugar, current_protein, current_energy):
+    """Find healthier alternatives using native Python types to avoid numpy errors"""
+    first_word = product_name.split(' ')[0]
+    
+    # FIX: Explicitly cast numpy floats to python floats
+    c_sugar = float(current_sugar)
+    c_protein = float(current_protein)
+    c_energy = float(current_energy)
+    
+    return execute_query(HEALTHIER_ALTERNATIVES_QUERY, params={
         'cat_search': f"%{first_word}%",
         'current_name': product_name,
         'sugar': c_sugar,
         'protein': c_protein,
         'energy': c_energy
-    })
+    }, statement='healthier_alternatives', budget='search')
 
-def find_similar_products_by_macros(energy, sugar, protein, tolerance=0.2):
-    """Find products with similar nutritional profile"""
-    # FIX: Explicitly cast to python floats
-    val_e = float(energy)
-    val_s = float(sugar)
-    val_p = float(protein)
-    
-    query = """
+SIMILAR_BY_MACROS_QUERY = """
     SELECT 
         dp.product_name,
         fn.brand_name,
@@ -151,11 +161,24 @@ def find_similar_products_by_macros(energy, sugar, protein, tolerance=0.2):
       AND fn.proteins_100g BETWEEN :min_p AND :max_p
     LIMIT 10;
     """
-    return execute_query(query, params={
+register_statement('similar_by_macros', SIMILAR_BY_MACROS_QUERY, {
+    'min_e': 'numeric', 'max_e': 'numeric',
+    'min_s': 'numeric', 'max_s': 'numeric',
+    'min_p': 'numeric', 'max_p': 'numeric'
+})
+
+def find_similar_products_by_macros(energy, sugar, protein, tolerance=0.2):
+    """Find products with similar nutritional profile"""
+    # FIX: Explicitly cast to python floats
+    val_e = float(energy)
+    val_s = float(sugar)
+    val_p = float(protein)
+    
+    return execute_query(SIMILAR_BY_MACROS_QUERY, params={
         'min_e': val_e * (1 - tolerance), 'max_e': val_e * (1 + tolerance),
         'min_s': val_s * (1 - tolerance), 'max_s': val_s * (1 + tolerance),
         'min_p': val_p * (1 - tolerance), 'max_p': val_p * (1 + tolerance)
-    })
+    }, statement='similar_by_macros', budget='search')
 
 # ==============================================================================
 # 5. EXISTING ANALYTICS
@@ -178,6 +201,14 @@ def get_nutrition_distribution_by_category(grade=None):
     return execute_query(query, params)
 
 def get_nutrition_by_grade():
+    summary = get_dataset_summary()
+    if not summary.empty:
+        row = summary.iloc[0]
+        df = pd.DataFrame({
+            'nutrition_grade': list('abcde'),
+            'product_count': [int(row[f'grade_{grade}_count']) for grade in 'abcde']
+        })
+        return df[df['product_count'] > 0].reset_index(drop=True)
     return execute_query("SELECT nutriscore_grade as nutrition_grade, COUNT(*) as product_count FROM analytics.dim_products WHERE nutriscore_grade IS NOT NULL GROUP BY nutriscore_grade ORDER BY nutriscore_grade;")
 
 def get_energy_vs_nutrients_scatter():
@@ -0,0 +1,183 @@
+"""Shared query-result cache for execute_query(), keyed by dataset version (SQLite, Redis or in-process)"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+
+KEY_PREFIX = "food_explorer:query:v1:"
+# Last good result of each query, whatever the version; served when a query runs over budget
+STALE_PREFIX = "food_explorer:stale:v1:"
+
+
+def version_prefix(version) -> str:
+    """Key prefix shared by every entry cached for one dataset version"""
+    return f"{KEY_PREFIX}{version}:"
+
+
+def _query_digest(query: str, params: Optional[dict]) -> str:
+    normalized_sql = " ".join(query.split()).rstrip(';').strip()
+    normalized_params = json.dumps(params or {}, sort_keys=True, default=str)
+    return hashlib.sha256(f"{normalized_sql}\n{normalized_params}".encode()).hexdigest()
+
+
+def make_cache_key(query: str, params: Optional[dict] = None, version=None) -> str:
+    """Cache key for a query: whitespace and a trailing ';' do not change it, parameter order does not matter"""
+    return version_prefix(version) + _query_digest(query, params)
+
+
+def make_stale_key(query: str, params: Optional[dict] = None) -> str:
+    """Key of the query's last good result; survives version changes"""
+    return STALE_PREFIX + _query_digest(query, params)
+
+
+def serialize_frame(df: pd.DataFrame) -> bytes:
+    """DataFrame -> compressed Arrow IPC stream"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression='zstd' if pa.Codec.is_available('zstd') else None)
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def deserialize_frame(data: bytes) -> pd.DataFrame:
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+class MemoryCache:
+    """In-process LRU cache of at most `max_entries` results; used when no shared cache is configured or reachable"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict_other_versions(self, version):
+        current = version_prefix(version)
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(KEY_PREFIX) and not k.startswith(current)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache:
+    """Cache in a SQLite file; one connection per thread, expired rows purged every `purge_every` writes"""
+
+    def __init__(self, path: str, purge_every: int = 100):
+        self.path = path
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")  # Readers never block the writer
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value FROM query_cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO query_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                         (key, sqlite3.Binary(value), expires_at))
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                conn.execute("DELETE FROM query_cache WHERE expires_at <= ?", (time.time(),))
+
+    def evict_other_versions(self, version):
+        # Stale copies (STALE_PREFIX) are kept until they expire
+        with self._connection() as conn:
+            conn.execute("DELETE FROM query_cache WHERE substr(key, 1, ?) = ? AND substr(key, 1, ?) != ?",
+                         (len(KEY_PREFIX), KEY_PREFIX, len(version_prefix(version)), version_prefix(version)))
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM query_cache")
+
+
+class RedisCache:
+    """Cache on a Redis-protocol server; `client` can be any redis.Redis-compatible object"""
+
+    def __init__(self, url: str = "redis://localhost:6379/0", client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError("QUERY_CACHE_BACKEND=redis needs the 'redis' package (pip install redis)") from e
+            client = redis.Redis.from_url(url, socket_timeout=2)
+        self.client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self.client.set(key, value, ex=int(ttl) if ttl else None)
+
+    def evict_other_versions(self, version):
+        current = version_prefix(version).encode()
+        for key in self.client.scan_iter(match=KEY_PREFIX + "*"):
+            if not (key if isinstance(key, bytes) else key.encode()).startswith(current):
+                self.client.delete(key)
+
+    def clear(self):
+        for prefix in (KEY_PREFIX, STALE_PREFIX):
+            for key in self.client.scan_iter(match=prefix + "*"):
+                self.client.delete(key)
+
+
+def create_cache(backend: str, path: Optional[str] = None, url: Optional[str] = None, max_entries: int = 256):
+    """Backend by name: 'sqlite', 'redis', or 'none' (no shared cache: an in-process MemoryCache)"""
+    if backend == 'sqlite':
+        return SQLiteCache(path)
+    if backend == 'redis':
+        return RedisCache(url)
+    if backend == 'none':
+        return MemoryCache(max_entries)
+    raise ValueError(f"Unknown QUERY_CACHE_BACKEND: {backend!r} (expected 'sqlite', 'redis' or 'none')")
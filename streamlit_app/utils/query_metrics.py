@@ -0,0 +1,150 @@
+"""Per-query latency, row, cache and error metrics for execute_query()"""
+
+import threading
+from collections import deque
+from typing import Optional
+
+# Upper bounds (seconds) of the Prometheus latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 when empty)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class _QueryStats:
+    def __init__(self, window: int):
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.timeouts = 0
+        self.stale_serves = 0
+        self.rows = 0
+        self.bytes = 0
+        self.latency_sum_s = 0.0
+        self.recent_s = deque(maxlen=window)
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.last_error = None
+
+
+class QueryMetrics:
+    """Thread-safe per-name counters and latency samples"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name: str, seconds: float, rows: int = 0, nbytes: int = 0,
+               cache_hit: Optional[bool] = None, error: Optional[str] = None,
+               timed_out: bool = False, stale: bool = False):
+        """One call; cache_hit is None when the call did not use the cache"""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _QueryStats(self.window)
+            stats.calls += 1
+            stats.latency_sum_s += seconds
+            stats.recent_s.append(seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats.bucket_counts[i] += 1
+            if cache_hit is True:
+                stats.cache_hits += 1
+            elif cache_hit is False:
+                stats.cache_misses += 1
+            if timed_out:
+                stats.timeouts += 1
+            if stale:
+                stats.stale_serves += 1
+            if error is not None:
+                stats.errors += 1
+                stats.last_error = error
+            else:
+                stats.rows += rows
+                stats.bytes += nbytes
+
+    def snapshot(self) -> list:
+        """One dict per query name, slowest p95 first"""
+        rows = []
+        with self._lock:
+            for name, s in self._stats.items():
+                recent = sorted(s.recent_s)
+                lookups = s.cache_hits + s.cache_misses
+                rows.append({
+                    'query': name,
+                    'calls': s.calls,
+                    'errors': s.errors,
+                    'cache_hits': s.cache_hits,
+                    'cache_misses': s.cache_misses,
+                    'timeouts': s.timeouts,
+                    'stale_serves': s.stale_serves,
+                    'cache_hit_ratio': s.cache_hits / lookups if lookups else None,
+                    'p50_ms': 1000 * percentile(recent, 50),
+                    'p95_ms': 1000 * percentile(recent, 95),
+                    'p99_ms': 1000 * percentile(recent, 99),
+                    'mean_ms': 1000 * s.latency_sum_s / s.calls,
+                    'rows': s.rows,
+                    'bytes': s.bytes,
+                    'last_error': s.last_error,
+                })
+        return sorted(rows, key=lambda r: r['p95_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def to_prometheus(self, extra_gauges: Optional[dict] = None) -> str:
+        """Prometheus text exposition format; `extra_gauges` adds gauges (e.g. pool and replica state)"""
+        with self._lock:
+            items = sorted(
+                (name, s.calls, s.errors, s.cache_hits, s.cache_misses, s.rows, s.bytes,
+                 s.latency_sum_s, list(s.bucket_counts), s.timeouts, s.stale_serves)
+                for name, s in self._stats.items()
+            )
+
+        def label(name):
+            return name.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        lines = [
+            "# HELP food_explorer_query_duration_seconds Time spent in execute_query()",
+            "# TYPE food_explorer_query_duration_seconds histogram",
+        ]
+        for name, calls, _, _, _, _, _, total_s, buckets, _, _ in items:
+            for bound, count in zip(LATENCY_BUCKETS, buckets):
+                lines.append(f'food_explorer_query_duration_seconds_bucket{{query="{label(name)}",le="{bound}"}} {count}')
+            lines.append(f'food_explorer_query_duration_seconds_bucket{{query="{label(name)}",le="+Inf"}} {calls}')
+            lines.append(f'food_explorer_query_duration_seconds_sum{{query="{label(name)}"}} {total_s:.6f}')
+            lines.append(f'food_explorer_query_duration_seconds_count{{query="{label(name)}"}} {calls}')
+
+        counters = [
+            ('errors', 2, "Queries that raised an error"),
+            ('cache_hits', 3, "Results served from the shared query cache"),
+            ('cache_misses', 4, "Cache lookups that went to the database"),
+            ('rows', 5, "Rows returned"),
+            ('bytes', 6, "In-memory size of the returned DataFrames"),
+            ('timeouts', 9, "Queries cancelled by their statement_timeout budget"),
+            ('stale_serves', 10, "Over-budget queries answered with the last good cached result"),
+        ]
+        for metric, index, help_text in counters:
+            lines.append(f"# HELP food_explorer_query_{metric}_total {help_text}")
+            lines.append(f"# TYPE food_explorer_query_{metric}_total counter")
+            for item in items:
+                lines.append(f'food_explorer_query_{metric}_total{{query="{label(item[0])}"}} {item[index]}')
+
+        typed = set()
+        for metric, value in (extra_gauges or {}).items():
+            base = metric.split('{')[0]  # Keys may carry labels: 'name{label="..."}'
+            if base not in typed:
+                lines.append(f"# TYPE food_explorer_{base} gauge")
+                typed.add(base)
+            lines.append(f"food_explorer_{metric} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+query_metrics = QueryMetrics()
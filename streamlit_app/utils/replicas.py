@@ -0,0 +1,130 @@
+"""Least-outstanding-requests routing of read-only queries over health-checked replicas"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import text
+
+# The last replayed commit gets older while the primary is idle, so a replica that has
+# replayed everything it received counts as 0s behind whatever that commit's age
+HEALTH_CHECK_SQL = """
+    SELECT pg_is_in_recovery() AS in_recovery,
+           CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+           END AS lag_s
+"""
+
+
+class Replica:
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True          # Optimistic until the first check says otherwise
+        self.outstanding = 0         # Queries in flight
+        self.requests = 0
+        self.failures = 0
+        self.lag_s = None
+        self.last_error = None
+        self.checked_at = None
+
+
+class ReplicaRouter:
+    """Least-outstanding-requests routing over health-checked replica engines"""
+
+    def __init__(self, replicas: List[Replica], check_interval: float = 10.0, max_lag_s: float = 0.0):
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.max_lag_s = max_lag_s
+        self._lock = threading.Lock()
+        self._next = 0               # Rotates ties so idle replicas share the load
+        self._checker = None
+
+    def start(self):
+        """Check every replica in a daemon thread, starting now, so no request waits for the checks"""
+        self._checker = threading.Thread(target=self._check_loop, name='replica-health', daemon=True)
+        self._checker.start()
+        return self
+
+    def _check_loop(self):
+        while True:
+            self.check_all()
+            time.sleep(self.check_interval)
+
+    def check_all(self):
+        for replica in self.replicas:
+            self.check(replica)
+
+    def check(self, replica: Replica) -> bool:
+        try:
+            with replica.engine.connect() as conn:
+                row = conn.execute(text(HEALTH_CHECK_SQL)).one()
+            lag_s = float(row.lag_s) if row.in_recovery and row.lag_s is not None else None
+            error = None
+            if self.max_lag_s and lag_s is not None and lag_s > self.max_lag_s:
+                error = f"replication lag {lag_s:.1f}s > {self.max_lag_s:g}s"
+        except Exception as e:
+            lag_s, error = None, f"{type(e).__name__}: {e}"
+        with self._lock:
+            replica.lag_s = lag_s
+            replica.healthy = error is None
+            replica.last_error = error or replica.last_error
+            replica.checked_at = time.time()
+        return error is None
+
+    def acquire(self) -> Optional[Replica]:
+        """The healthy replica with the fewest queries in flight (None if all are down), counted as busy"""
+        with self._lock:
+            healthy = [r for r in self.replicas if r.healthy]
+            if not healthy:
+                return None
+            start = self._next % len(healthy)
+            self._next += 1
+            rotated = healthy[start:] + healthy[:start]
+            replica = min(rotated, key=lambda r: r.outstanding)
+            replica.outstanding += 1
+            replica.requests += 1
+            return replica
+
+    def release(self, replica: Replica, failed: bool = False, error: Optional[str] = None):
+        with self._lock:
+            replica.outstanding -= 1
+            if failed:
+                replica.failures += 1
+                replica.healthy = False
+                replica.last_error = error
+
+    @contextmanager
+    def connect(self, fallback):
+        """A connection to the chosen replica, or from `fallback()` (the primary) if none can be used"""
+        replica = self.acquire()
+        if replica is None:
+            with fallback() as conn:
+                yield conn
+            return
+        try:
+            conn = replica.engine.connect()
+        except Exception as e:
+            self.release(replica, failed=True, error=f"{type(e).__name__}: {e}")
+            with fallback() as conn:
+                yield conn
+            return
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.release(replica)
+
+    def status(self) -> list:
+        with self._lock:
+            return [{
+                'replica': r.name,
+                'healthy': r.healthy,
+                'outstanding': r.outstanding,
+                'requests': r.requests,
+                'failures': r.failures,
+                'lag_s': r.lag_s,
+                'checked_at': r.checked_at,
+                'last_error': r.last_error,
+            } for r in self.replicas]